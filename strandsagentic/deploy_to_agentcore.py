@@ -5,111 +5,546 @@ Complete deployment script for Flight Cargo Assessment to Bedrock AgentCore
 
 import os
 import sys
+import io
 import json
+import mmap
+import zlib
+import shutil
+import uuid
+import hashlib
 import boto3
 import zipfile
 import tempfile
+import threading
+import multiprocessing
 import subprocess
+from botocore.config import Config
+from botocore.exceptions import ClientError, ReadTimeoutError
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+)
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, BinaryIO, Iterable, List, Optional, Tuple, Union
 import time
 import logging
+from datetime import datetime, timezone
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Files smaller than this are stored raw; deflate gains nothing on them
+SMALL_FILE_THRESHOLD = 1024
+# Level 1 keeps most of the size reduction at a fraction of the CPU time
+DEFLATE_LEVEL = 1
+# Already-compressed or binary content that barely shrinks under deflate
+STORED_SUFFIXES = {'.whl', '.so', '.pyd', '.png', '.jpg', '.gz'}
+
+# Lambda rejects functions whose code plus layers exceed this once unzipped
+LAMBDA_UNPACKED_LIMIT = 250 * 1024 * 1024
+
+# Artifacts are streamed to S3 in parts of this size (S3 minimum is 5MiB)
+S3_PART_SIZE = 16 * 1024 * 1024
+S3_UPLOAD_WORKERS = 8
+
+TEMPLATE_PATH = 'bedrock_agentcore_cloudformation.yaml'
+# Stack tag recording which template revision the stack was deployed from
+TEMPLATE_DIGEST_TAG = 'TemplateSHA256'
+
+# Logical ID of the agent executor function in the template
+LAMBDA_FUNCTION_RESOURCE = 'LambdaExecutorFunction'
+
+# Stack statuses that end a create/update operation
+STACK_SUCCESS_STATUSES = {'CREATE_COMPLETE', 'UPDATE_COMPLETE'}
+STACK_FAILURE_STATUSES = {
+    'CREATE_FAILED', 'ROLLBACK_COMPLETE', 'ROLLBACK_FAILED',
+    'UPDATE_FAILED', 'UPDATE_ROLLBACK_COMPLETE', 'UPDATE_ROLLBACK_FAILED'
+}
+STACK_POLL_MIN_DELAY = 2
+STACK_POLL_MAX_DELAY = 20
+STACK_TIMEOUT_SECONDS = 30 * 60
+
+# Wall-clock budget for the post-deploy agent smoke test
+AGENT_TEST_TIMEOUT_SECONDS = 20
+
+# Directories never shipped in the application package
+APP_EXCLUDED_DIRS = {'__pycache__', 'tests', '.pytest_cache'}
+
+# Persistent wheel cache shared by every packaging run
+PIP_CACHE_DIR = ".pip-cache"
+
+# Lambda-compatible build image used for containerized dependency installs
+LAMBDA_BUILD_IMAGE = "public.ecr.aws/sam/build-{runtime}"
+
+# Lambda architecture -> (pip wheel platform, docker platform) for dependency installs
+LAMBDA_PLATFORMS = {
+    "x86_64": ("manylinux2014_x86_64", "linux/amd64"),
+    "arm64": ("manylinux2014_aarch64", "linux/arm64")
+}
+
+# Installed content Lambda never needs at import time
+LAYER_PRUNE_DIRS = {"__pycache__", "tests"}
+LAYER_PRUNE_SUFFIXES = {".pyi"}
+
+
+def _compress_one(path: str, arcname: str) -> Tuple[zipfile.ZipInfo, bytes]:
+    """
+    Compress a single file into a raw deflate stream ready for embedding in a zip
+    
+    Runs in a worker process so that large dependency trees are compressed on
+    every available core.
+    
+    Args:
+        path: File to read
+        arcname: Name of the entry inside the archive
+        
+    Returns:
+        Tuple of the prepared zip entry header and its (possibly compressed) payload
+    """
+    # A large buffer lets the whole file arrive in a few sequential reads
+    with open(path, 'rb', buffering=1 << 20) as f:
+        raw = f.read()
+    
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.CRC = zlib.crc32(raw)
+    zinfo.file_size = len(raw)
+    
+    if len(raw) < SMALL_FILE_THRESHOLD or Path(path).suffix in STORED_SUFFIXES:
+        zinfo.compress_type = zipfile.ZIP_STORED
+        payload = raw
+    else:
+        # Raw deflate (negative wbits): no zlib header, as the zip format expects
+        compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+        payload = compressor.compress(raw) + compressor.flush()
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+    
+    zinfo.compress_size = len(payload)
+    return zinfo, payload
+
+
+def _write_precompressed(zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, payload: bytes) -> None:
+    """
+    Append an already compressed entry to an open zip archive
+    
+    zipfile has no public API for pre-compressed data, so the local header and
+    payload are written directly and the central directory bookkeeping is
+    updated the same way ZipFile.write does internally.
+    """
+    zinfo.header_offset = zipf.fp.tell()
+    zipf.fp.write(zinfo.FileHeader())
+    zipf.fp.write(payload)
+    zipf.start_dir = zipf.fp.tell()
+    zipf._didModify = True
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+
+
+def build_zip(destination: Union[Path, BinaryIO], entries: Iterable[Tuple[Path, str]]) -> Tuple[int, int]:
+    """
+    Build a zip archive, compressing entries in parallel across CPU cores
+    
+    Args:
+        destination: Archive path or writable stream (need not be seekable)
+        entries: (file path, archive name) pairs
+        
+    Returns:
+        Tuple of total unpacked size and total compressed size in bytes
+    """
+    entries = sorted(entries, key=lambda entry: entry[1])
+    paths = [str(path) for path, _ in entries]
+    arcnames = [arcname for _, arcname in entries]
+    unpacked_size = 0
+    packed_size = 0
+    
+    # build_zip runs on packaging threads while S3 uploads are in flight, and
+    # forking a threaded process can deadlock the child on a held lock
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    mp_context = multiprocessing.get_context(start_method)
+    
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=mp_context) as pool, \
+            zipfile.ZipFile(destination, 'w') as zipf:
+        # map() yields in submission order, so entries are written as soon as
+        # they are ready while the archive layout stays reproducible
+        for zinfo, payload in pool.map(_compress_one, paths, arcnames, chunksize=16):
+            _write_precompressed(zipf, zinfo, payload)
+            unpacked_size += zinfo.file_size
+            packed_size += zinfo.compress_size
+    
+    return unpacked_size, packed_size
+
+
+def _content_digest(paths: Iterable[Path]) -> str:
+    """
+    Compute a SHA-256 digest over file names and contents
+    
+    Args:
+        paths: Files to hash; order does not matter
+        
+    Returns:
+        Hex digest that changes whenever any file is added, renamed or edited
+    """
+    digest = hashlib.sha256()
+    
+    for path in sorted(paths, key=lambda p: p.as_posix()):
+        digest.update(path.as_posix().encode('utf-8') + b'\0')
+        if path.stat().st_size == 0:
+            continue
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            digest.update(mapped)
+    
+    return digest.hexdigest()
+
+
+def _prune_layer(layer_dir: Path) -> None:
+    """
+    Remove files from an installed layer that are not needed at runtime
+    
+    Args:
+        layer_dir: Directory pip installed the dependencies into
+    """
+    for path in sorted(layer_dir.rglob('*'), reverse=True):
+        if not path.exists():
+            continue
+        if path.is_dir():
+            if path.name in LAYER_PRUNE_DIRS:
+                shutil.rmtree(path)
+        elif path.suffix in LAYER_PRUNE_SUFFIXES or (
+                path.name == 'RECORD' and path.parent.name.endswith('.dist-info')):
+            path.unlink()
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """
+    Write-only stream that uploads everything written to it as an S3 multipart upload
+    
+    Writes are buffered into fixed-size parts and each full part is uploaded by
+    a bounded thread pool while the producer keeps writing, so archives flow
+    straight from the compressor to S3 without a local file.
+    
+    Keys are content-addressed and trusted once they exist, so the object is
+    only published by complete(), which a clean exit from the with-block
+    calls. Closing or discarding the writer any other way aborts the upload.
+    """
+    
+    def __init__(self, s3_client: Any, bucket: str, key: str,
+                 metadata: Optional[Dict[str, str]] = None, tagging: Optional[str] = None,
+                 part_size: int = S3_PART_SIZE, max_workers: int = S3_UPLOAD_WORKERS):
+        """
+        Start the multipart upload
+        
+        Args:
+            s3_client: boto3 S3 client
+            bucket: Destination bucket
+            key: Destination object key
+            metadata: Optional user metadata for the object
+            tagging: Optional URL-encoded object tags
+            part_size: Bytes per uploaded part
+            max_workers: Maximum number of parts uploading at once
+        """
+        super().__init__()
+        self._upload_id = None
+        self._s3 = s3_client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = part_size
+        self._max_workers = max_workers
+        self._buffer = bytearray()
+        self._position = 0
+        self._futures: List[Any] = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        
+        extra_args: Dict[str, Any] = {}
+        if metadata:
+            extra_args['Metadata'] = metadata
+        if tagging:
+            extra_args['Tagging'] = tagging
+        
+        response = self._s3.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)
+        self._upload_id = response['UploadId']
+    
+    def writable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self._position += len(data)
+        
+        while len(self._buffer) >= self._part_size:
+            self._submit_part(bytes(self._buffer[:self._part_size]))
+            del self._buffer[:self._part_size]
+        
+        return len(data)
+    
+    def _submit_part(self, body: bytes) -> None:
+        """Queue a part for upload, blocking while too many parts are in flight"""
+        in_flight = [future for future in self._futures if not future.done()]
+        if len(in_flight) >= self._max_workers:
+            wait(in_flight, return_when=FIRST_COMPLETED)
+        
+        part_number = len(self._futures) + 1
+        self._futures.append(self._executor.submit(self._upload_part, part_number, body))
+    
+    def _upload_part(self, part_number: int, body: bytes) -> Dict[str, Any]:
+        response = self._s3.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body
+        )
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+    
+    def complete(self) -> None:
+        """Upload the remaining buffer and complete the multipart upload"""
+        if self.closed:
+            raise ValueError("upload already closed")
+        
+        try:
+            # An upload needs at least one part, even if it is empty
+            if self._buffer or not self._futures:
+                self._submit_part(bytes(self._buffer))
+                self._buffer.clear()
+            
+            parts = [future.result() for future in self._futures]
+            self._s3.complete_multipart_upload(
+                Bucket=self._bucket,
+                Key=self._key,
+                UploadId=self._upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._executor.shutdown(wait=True)
+            super().close()
+    
+    def close(self) -> None:
+        """Abort the upload unless complete() already published it"""
+        self.abort()
+    
+    def abort(self, wait: bool = True) -> None:
+        """
+        Abandon the upload so S3 discards any parts already stored
+        
+        Args:
+            wait: Wait for parts already uploading before aborting
+        """
+        if self.closed:
+            return
+        
+        try:
+            # __init__ may have failed before the upload was created
+            if self._upload_id is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._s3.abort_multipart_upload(
+                    Bucket=self._bucket,
+                    Key=self._key,
+                    UploadId=self._upload_id
+                )
+        finally:
+            super().close()
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.complete()
+    
+    def __del__(self) -> None:
+        # IOBase.__del__ would close(); make the abort explicit for leaked writers.
+        # The last reference may be dropped on an upload thread, which can't join itself
+        if not self.closed:
+            self.abort(wait=False)
+
 
 class AgentCoreDeployment:
     """
     Complete deployment orchestrator for Bedrock AgentCore
     """
     
-    def __init__(self, region: str = "us-east-1", environment: str = "production"):
+    def __init__(self, region: str = "us-east-1", environment: str = "production",
+                 use_container: bool = False):
         """
         Initialize deployment
         
         Args:
             region: AWS region
             environment: Deployment environment
+            use_container: Install dependencies inside the Lambda build image via Docker
         """
         self.region = region
         self.environment = environment
+        self.use_container = use_container
         self.stack_name = f"flight-cargo-assessment-{environment}"
         
-        # AWS clients
-        self.cloudformation = boto3.client('cloudformation', region_name=region)
-        self.s3 = boto3.client('s3', region_name=region)
-        self.lambda_client = boto3.client('lambda', region_name=region)
-        self.bedrock_agent = boto3.client('bedrock-agent', region_name=region)
+        # AWS clients share one session and connection-pool configuration and
+        # are created on first use
+        self._session = boto3.session.Session(region_name=region)
+        self._botocfg = Config(
+            max_pool_connections=32,
+            retries={'mode': 'adaptive', 'max_attempts': 10},
+            tcp_keepalive=True
+        )
+        self._clients: Dict[str, Any] = {}
+        self._clients_lock = threading.Lock()
+        self._prereq_ok = False
+        self._resources: Dict[str, str] = {}
         
         # Deployment configuration
         self.config = {
             "agent_name": "flight-cargo-assessment-agent",
             "foundation_model": "anthropic.claude-3-5-sonnet-20241022-v2:0",
             "lambda_runtime": "python3.11",
+            "lambda_architecture": "x86_64",  # Must match the layer's CompatibleArchitectures
             "timeout": 300,
             "memory_size": 512
         }
     
+    def _client(self, service_name: str) -> Any:
+        """
+        Get a cached boto3 client for a service
+        
+        Clients are thread-safe once built, but creating them from a shared
+        session is not, so creation is serialized.
+        
+        Args:
+            service_name: AWS service name
+            
+        Returns:
+            boto3 client bound to the deployment session
+        """
+        with self._clients_lock:
+            if service_name not in self._clients:
+                self._clients[service_name] = self._session.client(service_name, config=self._botocfg)
+            return self._clients[service_name]
+    
+    @property
+    def cloudformation(self) -> Any:
+        """CloudFormation client"""
+        return self._client('cloudformation')
+    
+    @property
+    def s3(self) -> Any:
+        """S3 client"""
+        return self._client('s3')
+    
+    @property
+    def lambda_client(self) -> Any:
+        """Lambda client"""
+        return self._client('lambda')
+    
+    @property
+    def bedrock_agent(self) -> Any:
+        """Bedrock Agent client"""
+        return self._client('bedrock-agent')
+    
+    def _check_credentials(self) -> bool:
+        """Check AWS credentials"""
+        identity = self._client('sts').get_caller_identity()
+        logger.info(f"✅ AWS credentials valid for account: {identity['Account']}")
+        return True
+    
+    def _check_bedrock_access(self) -> bool:
+        """Check Bedrock access to the configured foundation model"""
+        bedrock = self._client('bedrock')
+        model_id = self.config['foundation_model']
+        
+        try:
+            bedrock.get_foundation_model(modelIdentifier=model_id)
+        except bedrock.exceptions.ResourceNotFoundException:
+            logger.error(f"❌ Foundation model not available in {self.region}: {model_id}")
+            return False
+        
+        logger.info(f"✅ Bedrock accessible with model {model_id}")
+        return True
+    
+    def _check_required_files(self) -> bool:
+        """Check required files"""
+        required_files = [
+            'lambda_handler.py',
+            TEMPLATE_PATH,
+            'requirements.txt'
+        ]
+        required_dirs = ['flight_cargo_assessment']
+        
+        # One directory scan instead of a stat() per path
+        with os.scandir('.') as scan:
+            entries = {entry.name: entry for entry in scan}
+        
+        missing = [name for name in required_files if name not in entries]
+        missing.extend(
+            f"{name}/" for name in required_dirs
+            if name not in entries or not entries[name].is_dir()
+        )
+        
+        for file_path in missing:
+            logger.error(f"❌ Required file/directory not found: {file_path}")
+        if missing:
+            return False
+        
+        logger.info("✅ All required files present")
+        return True
+    
+    def _check_python_packages(self) -> bool:
+        """Check Python dependencies"""
+        try:
+            import boto3
+            import click
+            import rich
+            logger.info("✅ Required Python packages available")
+            return True
+        except ImportError as e:
+            logger.error(f"❌ Missing Python package: {e}")
+            return False
+    
     def validate_prerequisites(self) -> bool:
         """
         Validate deployment prerequisites
         
+        The individual checks are independent, so they run concurrently.
+        Only a successful result is remembered; failures are re-checked on the next call.
+        
         Returns:
             True if all prerequisites are met
         """
+        if self._prereq_ok:
+            return True
+        
         logger.info("🔍 Validating deployment prerequisites...")
         
+        checks = [
+            self._check_credentials,
+            self._check_bedrock_access,
+            self._check_required_files,
+            self._check_python_packages
+        ]
+        
         try:
-            # Check AWS credentials
-            sts = boto3.client('sts')
-            identity = sts.get_caller_identity()
-            logger.info(f"✅ AWS credentials valid for account: {identity['Account']}")
-            
-            # Check Bedrock access
-            bedrock = boto3.client('bedrock', region_name=self.region)
-            models = bedrock.list_foundation_models()
-            claude_models = [m for m in models['modelSummaries'] if 'claude' in m['modelId'].lower()]
-            logger.info(f"✅ Bedrock accessible with {len(claude_models)} Claude models")
-            
-            # Check required files
-            required_files = [
-                'lambda_handler.py',
-                'bedrock_agentcore_cloudformation.yaml',
-                'requirements.txt',
-                'flight_cargo_assessment/'
-            ]
-            
-            for file_path in required_files:
-                if not Path(file_path).exists():
-                    logger.error(f"❌ Required file/directory not found: {file_path}")
-                    return False
-            
-            logger.info("✅ All required files present")
-            
-            # Check Python dependencies
-            try:
-                import boto3
-                import click
-                import rich
-                logger.info("✅ Required Python packages available")
-            except ImportError as e:
-                logger.error(f"❌ Missing Python package: {e}")
-                return False
-            
-            return True
+            with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+                futures = [executor.submit(check) for check in checks]
+                self._prereq_ok = all(future.result() for future in futures)
             
         except Exception as e:
             logger.error(f"❌ Prerequisites validation failed: {e}")
             return False
+        
+        return self._prereq_ok
     
-    def package_dependencies(self) -> str:
+    def package_dependencies(self, bucket_name: str, key: str, digest: str) -> str:
         """
-        Package Python dependencies for Lambda layer
+        Package Python dependencies for Lambda layer and stream them to S3
         
+        Args:
+            bucket_name: S3 bucket name
+            key: S3 key for the layer zip
+            digest: Content digest of the inputs, recorded on the object
+            
         Returns:
-            Path to dependencies package
+            S3 key of the dependencies package
         """
         logger.info("📦 Packaging Python dependencies...")
         
@@ -117,81 +552,232 @@ class AgentCoreDeployment:
             layer_dir = Path(temp_dir) / "python"
             layer_dir.mkdir()
             
-            # Install dependencies
-            subprocess.run([
+            # Install prebuilt wheels for the Lambda runtime, whatever the host platform
+            env = {**os.environ, 'PIP_DISABLE_PIP_VERSION_CHECK': '1', 'PIP_NO_INPUT': '1'}
+            subprocess.run(self._pip_install_command(layer_dir), check=True, env=env)
+            
+            _prune_layer(layer_dir)
+            
+            # Stream the zip straight into S3
+            with self._artifact_writer(bucket_name, key, digest) as stream:
+                unpacked_size, packed_size = build_zip(stream, (
+                    (file_path, file_path.relative_to(temp_dir).as_posix())
+                    for file_path in layer_dir.rglob('*')
+                    if file_path.is_file()
+                ))
+        
+        logger.info(
+            f"✅ Dependencies packaged: s3://{bucket_name}/{key} "
+            f"({packed_size / 2**20:.1f}MB zipped, {unpacked_size / 2**20:.1f}MB unpacked)"
+        )
+        if unpacked_size > LAMBDA_UNPACKED_LIMIT:
+            logger.warning(
+                f"⚠️ Dependencies unpack to {unpacked_size / 2**20:.1f}MB, "
+                f"over Lambda's {LAMBDA_UNPACKED_LIMIT // 2**20}MB limit"
+            )
+        return key
+    
+    def _pip_install_command(self, layer_dir: Path) -> List[str]:
+        """
+        Build the pip command that installs requirements.txt into the layer
+        
+        Args:
+            layer_dir: Host directory receiving the installed packages
+            
+        Returns:
+            Command line to run
+        """
+        pip_args = [
+            "--no-deps",  # Only install what's in requirements.txt
+            "--no-compile"
+        ]
+        wheel_platform, docker_platform = LAMBDA_PLATFORMS[self.config['lambda_architecture']]
+        
+        if not self.use_container:
+            python_version = self.config['lambda_runtime'].replace('python', '')
+            return [
                 sys.executable, "-m", "pip", "install",
                 "-r", "requirements.txt",
                 "-t", str(layer_dir),
-                "--no-deps"  # Only install what's in requirements.txt
-            ], check=True)
-            
-            # Create zip file
-            layer_zip = Path("dependencies_layer.zip")
-            with zipfile.ZipFile(layer_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for file_path in layer_dir.rglob('*'):
-                    if file_path.is_file():
-                        arcname = file_path.relative_to(temp_dir)
-                        zipf.write(file_path, arcname)
-            
-            logger.info(f"✅ Dependencies packaged: {layer_zip}")
-            return str(layer_zip)
+                *pip_args,
+                "--only-binary=:all:",
+                "--platform", wheel_platform,
+                "--python-version", python_version,
+                "--implementation", "cp",
+                "--abi", f"cp{python_version.replace('.', '')}",
+                "--cache-dir", PIP_CACHE_DIR
+            ]
+        
+        # The Lambda build image matches the runtime's OS and glibc, so even
+        # packages that only ship source distributions build correctly. The
+        # platform is pinned so ARM hosts don't build native code for the wrong CPU
+        cache_dir = Path(PIP_CACHE_DIR).resolve()
+        cache_dir.mkdir(exist_ok=True)
+        command = ["docker", "run", "--rm", "--platform", docker_platform]
+        if hasattr(os, 'getuid'):
+            # Keep installed files owned by the host user so cleanup works
+            command += ["--user", f"{os.getuid()}:{os.getgid()}", "-e", "HOME=/tmp"]
+        return command + [
+            "-e", "PIP_DISABLE_PIP_VERSION_CHECK=1",
+            "-e", "PIP_NO_INPUT=1",
+            "-v", f"{Path('requirements.txt').resolve()}:/var/task/requirements.txt:ro",
+            "-v", f"{layer_dir.resolve()}:/var/task/python",
+            "-v", f"{cache_dir}:/tmp/pip-cache",
+            LAMBDA_BUILD_IMAGE.format(runtime=self.config['lambda_runtime']),
+            "pip", "install",
+            "-r", "/var/task/requirements.txt",
+            "-t", "/var/task/python",
+            *pip_args,
+            "--cache-dir", "/tmp/pip-cache"
+        ]
     
-    def package_application_code(self) -> str:
+    def _dependencies_digest(self) -> str:
         """
-        Package application code for Lambda
+        SHA-256 of requirements.txt, the install mode and the architecture, which determine the layer contents
+        
+        Host and container installs can resolve different builds of the same
+        requirements, so each gets its own digest.
+        """
+        digest = hashlib.sha256(b'container\0' if self.use_container else b'host\0')
+        digest.update(self.config['lambda_architecture'].encode() + b'\0')
+        digest.update(Path('requirements.txt').read_bytes())
+        return digest.hexdigest()
+    
+    def _dependencies_key(self) -> str:
+        """
+        S3 key of the dependencies layer
+        
+        The key depends only on the runtime, the architecture, the install
+        mode and requirements.txt, so every environment deploying the same
+        requirements the same way shares one layer object.
+        """
+        runtime_tag = self.config['lambda_runtime'].replace('python', 'py').replace('.', '')
+        return f"layers/{runtime_tag}-{self._dependencies_digest()[:16]}.zip"
+    
+    def _application_files(self) -> List[Path]:
+        """
+        List the files that make up the application package
         
         Returns:
-            Path to application package
+            Paths relative to the working directory
         """
-        logger.info("📦 Packaging application code...")
+        # Lambda handler plus the flight_cargo_assessment package, without
+        # test suites and caches
+        package_files = []
+        for root, dirs, names in os.walk('flight_cargo_assessment'):
+            dirs[:] = [d for d in dirs if d not in APP_EXCLUDED_DIRS]
+            package_files.extend(os.path.join(root, name) for name in names if name.endswith('.py'))
         
-        app_zip = Path("agent_application.zip")
+        files = [Path('lambda_handler.py')]
+        files.extend(Path(path) for path in sorted(package_files))
         
-        with zipfile.ZipFile(app_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add Lambda handler
-            zipf.write('lambda_handler.py')
-            
-            # Add flight_cargo_assessment package
-            for py_file in Path('flight_cargo_assessment').rglob('*.py'):
-                zipf.write(py_file)
+        # Add configuration files
+        if Path('bedrock_agent_config.json').exists():
+            files.append(Path('bedrock_agent_config.json'))
+        
+        return files
+    
+    def package_application_code(self, bucket_name: str, key: str, digest: str) -> str:
+        """
+        Package application code for Lambda and stream it to S3
+        
+        Args:
+            bucket_name: S3 bucket name
+            key: S3 key for the application zip
+            digest: Content digest of the inputs, recorded on the object
             
-            # Add configuration files
-            if Path('bedrock_agent_config.json').exists():
-                zipf.write('bedrock_agent_config.json')
+        Returns:
+            S3 key of the application package
+        """
+        logger.info("📦 Packaging application code...")
+        
+        with self._artifact_writer(bucket_name, key, digest) as stream:
+            build_zip(stream, ((path, path.as_posix()) for path in self._application_files()))
         
-        logger.info(f"✅ Application code packaged: {app_zip}")
-        return str(app_zip)
+        logger.info(f"✅ Application code packaged: s3://{bucket_name}/{key}")
+        return key
     
-    def upload_artifacts(self, bucket_name: str, dependencies_zip: str, app_zip: str) -> Dict[str, str]:
+    def _artifact_writer(self, bucket_name: str, key: str, digest: str) -> S3MultipartWriter:
+        """Open an S3 stream for an artifact, tagged with its content digest"""
+        return S3MultipartWriter(
+            self.s3, bucket_name, key,
+            metadata={'content-sha256': digest},
+            tagging=f"sha256={digest}"
+        )
+    
+    def _artifact_exists(self, bucket_name: str, key: str) -> bool:
         """
-        Upload deployment artifacts to S3
+        Check whether an artifact has already been uploaded
+        
+        Args:
+            bucket_name: S3 bucket name
+            key: S3 key of the artifact
+            
+        Returns:
+            True if the object exists
+        """
+        try:
+            self.s3.head_object(Bucket=bucket_name, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+    
+    def upload_artifacts(self, bucket_name: str) -> Dict[str, str]:
+        """
+        Package deployment artifacts and stream them to S3
+        
+        Artifact keys are derived from a digest of their inputs, so unchanged
+        packages already in the bucket are reused instead of rebuilt.
         
         Args:
             bucket_name: S3 bucket name
-            dependencies_zip: Path to dependencies package
-            app_zip: Path to application package
             
         Returns:
             Dictionary of S3 keys
         """
         logger.info(f"📤 Uploading artifacts to S3 bucket: {bucket_name}")
         
-        artifacts = {}
+        deps_digest = self._dependencies_digest()
+        app_digest = _content_digest(self._application_files())
+        packagers = {
+            'dependencies': (self.package_dependencies, self._dependencies_key(), deps_digest),
+            'application': (self.package_application_code, f"code/agent-code-{app_digest}.zip", app_digest)
+        }
         
-        # Upload dependencies layer
-        deps_key = f"layers/dependencies-{int(time.time())}.zip"
-        self.s3.upload_file(dependencies_zip, bucket_name, deps_key)
-        artifacts['dependencies'] = deps_key
-        logger.info(f"✅ Uploaded dependencies: s3://{bucket_name}/{deps_key}")
+        artifacts = {}
+        pending = {}
+        for name, (packager, key, digest) in packagers.items():
+            if self._artifact_exists(bucket_name, key):
+                logger.info(f"♻️ {name} unchanged, reusing s3://{bucket_name}/{key}")
+                artifacts[name] = key
+            else:
+                pending[name] = (packager, key, digest)
         
-        # Upload application code
-        app_key = f"code/agent-code-{int(time.time())}.zip"
-        self.s3.upload_file(app_zip, bucket_name, app_key)
-        artifacts['application'] = app_key
-        logger.info(f"✅ Uploaded application: s3://{bucket_name}/{app_key}")
+        # Build and upload the remaining packages concurrently over the shared client pool
+        if pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                futures = {
+                    executor.submit(packager, bucket_name, key, digest): name
+                    for name, (packager, key, digest) in pending.items()
+                }
+                for future in as_completed(futures):
+                    artifacts[futures[future]] = future.result()
         
         return artifacts
     
+    def _ensure_dependencies_layer(self, bucket_name: str) -> None:
+        """
+        Package and upload the dependencies layer unless it is already in the bucket
+        
+        Args:
+            bucket_name: S3 bucket name
+        """
+        key = self._dependencies_key()
+        if not self._artifact_exists(bucket_name, key):
+            self.package_dependencies(bucket_name, key, self._dependencies_digest())
+    
     def deploy_infrastructure(self) -> Dict[str, str]:
         """
         Deploy CloudFormation infrastructure
@@ -202,8 +788,9 @@ class AgentCoreDeployment:
         logger.info("🏗️ Deploying CloudFormation infrastructure...")
         
         # Read CloudFormation template
-        with open('bedrock_agentcore_cloudformation.yaml', 'r') as f:
-            template_body = f.read()
+        with open(TEMPLATE_PATH, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            template_digest = hashlib.sha256(mapped).hexdigest()
+            template_body = mapped[:].decode('utf-8')
         
         parameters = [
             {
@@ -221,49 +808,78 @@ class AgentCoreDeployment:
             {
                 'ParameterKey': 'LambdaRuntime',
                 'ParameterValue': self.config['lambda_runtime']
+            },
+            {
+                'ParameterKey': 'DependenciesLayerKey',
+                'ParameterValue': self._dependencies_key()
             }
         ]
         
         try:
-            # Check if stack exists
-            try:
-                self.cloudformation.describe_stacks(StackName=self.stack_name)
-                stack_exists = True
-            except self.cloudformation.exceptions.ClientError:
-                stack_exists = False
+            # Every event produced by this operation carries the request token,
+            # which lets the poller ignore events from earlier deployments
+            request_token = f"deploy-{uuid.uuid4()}"
             
-            if stack_exists:
-                logger.info(f"📝 Updating existing stack: {self.stack_name}")
-                self.cloudformation.update_stack(
-                    StackName=self.stack_name,
-                    TemplateBody=template_body,
-                    Parameters=parameters,
-                    Capabilities=['CAPABILITY_NAMED_IAM']
-                )
-                waiter = self.cloudformation.get_waiter('stack_update_complete')
-            else:
-                logger.info(f"🆕 Creating new stack: {self.stack_name}")
+            # Try to create first; an existing stack turns this into an update,
+            # so first deploys need no existence probe
+            try:
                 self.cloudformation.create_stack(
                     StackName=self.stack_name,
                     TemplateBody=template_body,
                     Parameters=parameters,
                     Capabilities=['CAPABILITY_NAMED_IAM'],
-                    Tags=[
-                        {'Key': 'Project', 'Value': 'FlightCargoAssessment'},
-                        {'Key': 'Environment', 'Value': self.environment},
-                        {'Key': 'ManagedBy', 'Value': 'CloudFormation'}
-                    ]
+                    ClientRequestToken=request_token,
+                    Tags=self._stack_tags(template_digest)
                 )
-                waiter = self.cloudformation.get_waiter('stack_create_complete')
+                logger.info(f"🆕 Creating new stack: {self.stack_name}")
+                stack_changing = True
+            except self.cloudformation.exceptions.AlreadyExistsException:
+                logger.info(f"📝 Updating existing stack: {self.stack_name}")
+                stack = self._describe_stack()
+                
+                # The update creates a layer version from DependenciesLayerKey,
+                # so that object must be in the bucket before the update starts
+                bucket_name = {
+                    output['OutputKey']: output['OutputValue'] for output in stack.get('Outputs', [])
+                }.get('S3BucketName')
+                if bucket_name:
+                    self._ensure_dependencies_layer(bucket_name)
+                
+                # An unchanged template only needs the parameters re-sent
+                deployed_digest = {
+                    tag['Key']: tag['Value'] for tag in stack.get('Tags', [])
+                }.get(TEMPLATE_DIGEST_TAG)
+                
+                if deployed_digest == template_digest:
+                    template_args = {'UsePreviousTemplate': True}
+                else:
+                    template_args = {
+                        'TemplateBody': template_body,
+                        'Tags': self._stack_tags(template_digest)
+                    }
+                
+                try:
+                    self.cloudformation.update_stack(
+                        StackName=self.stack_name,
+                        Parameters=parameters,
+                        Capabilities=['CAPABILITY_NAMED_IAM'],
+                        ClientRequestToken=request_token,
+                        **template_args
+                    )
+                    stack_changing = True
+                except ClientError as e:
+                    if 'No updates are to be performed' not in str(e):
+                        raise
+                    logger.info("✅ Stack already up to date")
+                    stack_changing = False
             
-            # Wait for completion
-            logger.info("⏳ Waiting for stack deployment to complete...")
-            waiter.wait(StackName=self.stack_name, WaiterConfig={'Delay': 30, 'MaxAttempts': 60})
+            if stack_changing:
+                logger.info("⏳ Waiting for stack deployment to complete...")
+                self._wait_for_stack(request_token)
             
             # Get stack outputs
-            response = self.cloudformation.describe_stacks(StackName=self.stack_name)
             outputs = {}
-            for output in response['Stacks'][0].get('Outputs', []):
+            for output in self._describe_stack().get('Outputs', []):
                 outputs[output['OutputKey']] = output['OutputValue']
             
             logger.info("✅ Infrastructure deployment completed")
@@ -273,23 +889,147 @@ class AgentCoreDeployment:
             logger.error(f"❌ Infrastructure deployment failed: {e}")
             raise
     
-    def update_lambda_code(self, function_name: str, app_zip: str) -> None:
+    def _describe_stack(self) -> Optional[Dict[str, Any]]:
+        """
+        Describe the deployment stack
+        
+        Always filtered by stack name, so the call costs the same however
+        many stacks the account holds.
+        
+        Returns:
+            Stack description, or None if the stack does not exist
+        """
+        paginator = self.cloudformation.get_paginator('describe_stacks')
+        try:
+            for page in paginator.paginate(StackName=self.stack_name):
+                for stack in page['Stacks']:
+                    return stack
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ValidationError' and 'does not exist' in str(e):
+                return None
+            raise
+        return None
+    
+    def _physical_resource_id(self, logical_id: str) -> str:
+        """
+        Resolve a stack resource's physical ID, e.g. a Lambda function name
+        
+        Args:
+            logical_id: Logical resource ID in the template
+            
+        Returns:
+            Physical resource ID, cached for the rest of the deployment
+        """
+        if logical_id not in self._resources:
+            response = self.cloudformation.describe_stack_resource(
+                StackName=self.stack_name,
+                LogicalResourceId=logical_id
+            )
+            self._resources[logical_id] = response['StackResourceDetail']['PhysicalResourceId']
+        return self._resources[logical_id]
+    
+    def _stack_tags(self, template_digest: str) -> List[Dict[str, str]]:
+        """
+        Build the tags applied to the deployment stack
+        
+        Args:
+            template_digest: SHA-256 of the template being deployed
+            
+        Returns:
+            CloudFormation tag list
+        """
+        return [
+            {'Key': 'Project', 'Value': 'FlightCargoAssessment'},
+            {'Key': 'Environment', 'Value': self.environment},
+            {'Key': 'ManagedBy', 'Value': 'CloudFormation'},
+            {'Key': TEMPLATE_DIGEST_TAG, 'Value': template_digest}
+        ]
+    
+    def _new_stack_events(self, request_token: str, last_event_id: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch stack events for an operation that have not been seen yet
+        
+        Args:
+            request_token: ClientRequestToken of the operation
+            last_event_id: Newest event already processed, if any
+            
+        Returns:
+            New events, newest first
+        """
+        events = []
+        paginator = self.cloudformation.get_paginator('describe_stack_events')
+        
+        # Events are returned newest first, so stop at the cursor or at the
+        # first event belonging to a different operation
+        for page in paginator.paginate(StackName=self.stack_name):
+            for event in page['StackEvents']:
+                if event['EventId'] == last_event_id or event.get('ClientRequestToken') != request_token:
+                    return events
+                events.append(event)
+        
+        return events
+    
+    def _wait_for_stack(self, request_token: str, timeout: float = STACK_TIMEOUT_SECONDS) -> None:
+        """
+        Wait for a stack operation to finish by following its stack events
+        
+        The poll delay shrinks while events are arriving and backs off while
+        the stack is idle, so short deployments return as soon as they finish.
+        
+        Args:
+            request_token: ClientRequestToken of the operation
+            timeout: Maximum time to wait in seconds
+        """
+        deadline = time.monotonic() + timeout
+        delay = STACK_POLL_MIN_DELAY
+        last_event_id = None
+        
+        while True:
+            events = self._new_stack_events(request_token, last_event_id)
+            
+            if events:
+                last_event_id = events[0]['EventId']
+                for event in reversed(events):
+                    status = event['ResourceStatus']
+                    logger.info(f"   {event['LogicalResourceId']}: {status}")
+                    
+                    if event['LogicalResourceId'] != self.stack_name:
+                        continue
+                    if status in STACK_SUCCESS_STATUSES:
+                        return
+                    if status in STACK_FAILURE_STATUSES:
+                        reason = event.get('ResourceStatusReason', 'no reason given')
+                        raise RuntimeError(f"Stack {self.stack_name} ended in {status}: {reason}")
+                
+                delay = max(delay / 2, STACK_POLL_MIN_DELAY)
+            else:
+                delay = min(delay * 1.5, STACK_POLL_MAX_DELAY)
+            
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Timed out waiting for stack {self.stack_name}")
+            time.sleep(delay)
+    
+    def update_lambda_code(self, function_name: str, bucket_name: str, key: str) -> None:
         """
         Update Lambda function code
         
+        Lambda fetches the package from S3 itself, so the zip bytes never pass
+        through the deploy host again and the 50MB inline upload limit does
+        not apply.
+        
         Args:
             function_name: Lambda function name
-            app_zip: Path to application zip
+            bucket_name: S3 bucket holding the application zip
+            key: S3 key of the application zip
         """
         logger.info(f"🔄 Updating Lambda function code: {function_name}")
         
         try:
-            with open(app_zip, 'rb') as f:
-                zip_content = f.read()
-            
             self.lambda_client.update_function_code(
                 FunctionName=function_name,
-                ZipFile=zip_content
+                S3Bucket=bucket_name,
+                S3Key=key,
+                Publish=False
             )
             
             # Wait for update to complete
@@ -333,8 +1073,15 @@ class AgentCoreDeployment:
                 "priority": "high"
             }
             
-            # Invoke agent
-            bedrock_agent_runtime = boto3.client('bedrock-agent-runtime', region_name=self.region)
+            # Invoke agent. A dedicated client bounds each socket wait by the
+            # test budget, so a stalled stream can't hang between events
+            test_config = self._botocfg.merge(Config(
+                connect_timeout=AGENT_TEST_TIMEOUT_SECONDS,
+                read_timeout=AGENT_TEST_TIMEOUT_SECONDS,
+                retries={'mode': 'standard', 'max_attempts': 1}
+            ))
+            with self._clients_lock:
+                bedrock_agent_runtime = self._session.client('bedrock-agent-runtime', config=test_config)
             
             response = bedrock_agent_runtime.invoke_agent(
                 agentId=agent_id,
@@ -343,18 +1090,33 @@ class AgentCoreDeployment:
                 inputText=f"Please assess this cargo: {json.dumps(test_request)}"
             )
             
-            # Process response
-            response_text = ""
-            for event in response['completion']:
-                if 'chunk' in event:
-                    response_text += event['chunk']['bytes'].decode('utf-8')
-            
-            if response_text and "assessment_successful" in response_text:
-                logger.info("✅ Agent test successful")
-                return True
-            else:
-                logger.warning("⚠️ Agent test returned unexpected response")
+            # Scan the raw chunks and stop as soon as the success marker
+            # appears; the rest of the answer is not needed. Only the tail that
+            # could hold the start of a split marker is carried between chunks
+            marker = b'assessment_successful'
+            deadline = time.monotonic() + AGENT_TEST_TIMEOUT_SECONDS
+            completion = response['completion']
+            tail = b''
+            try:
+                for event in completion:
+                    chunk = event.get('chunk')
+                    if chunk:
+                        window = tail + chunk['bytes']
+                        if marker in window:
+                            logger.info("✅ Agent test successful")
+                            return True
+                        tail = window[-(len(marker) - 1):]
+                    if time.monotonic() > deadline:
+                        logger.warning(f"⚠️ Agent test timed out after {AGENT_TEST_TIMEOUT_SECONDS}s")
+                        return False
+            except ReadTimeoutError:
+                logger.warning(f"⚠️ Agent test timed out after {AGENT_TEST_TIMEOUT_SECONDS}s")
                 return False
+            finally:
+                completion.close()
+            
+            logger.warning("⚠️ Agent test returned unexpected response")
+            return False
                 
         except Exception as e:
             logger.error(f"❌ Agent test failed: {e}")
@@ -375,25 +1137,19 @@ class AgentCoreDeployment:
             if not self.validate_prerequisites():
                 raise Exception("Prerequisites validation failed")
             
-            # Step 2: Package code
-            dependencies_zip = self.package_dependencies()
-            app_zip = self.package_application_code()
-            
-            # Step 3: Deploy infrastructure
+            # Step 2: Deploy infrastructure
             outputs = self.deploy_infrastructure()
             
-            # Step 4: Upload artifacts
+            # Step 3: Package code and stream it to the artifacts bucket
             bucket_name = outputs.get('S3BucketName')
             if bucket_name:
-                artifacts = self.upload_artifacts(bucket_name, dependencies_zip, app_zip)
+                artifacts = self.upload_artifacts(bucket_name)
                 
-                # Step 5: Update Lambda code
-                lambda_arn = outputs.get('LambdaFunctionArn')
-                if lambda_arn:
-                    function_name = lambda_arn.split(':')[-1]
-                    self.update_lambda_code(function_name, app_zip)
+                # Step 4: Update Lambda code
+                function_name = self._physical_resource_id(LAMBDA_FUNCTION_RESOURCE)
+                self.update_lambda_code(function_name, bucket_name, artifacts['application'])
             
-            # Step 6: Test deployment
+            # Step 5: Test deployment
             agent_id = outputs.get('AgentId')
             agent_alias_id = outputs.get('AgentAliasId')
             
@@ -415,14 +1171,9 @@ class AgentCoreDeployment:
                 "s3_bucket": bucket_name,
                 "agent_role_arn": outputs.get('AgentRoleArn'),
                 "test_passed": test_passed,
-                "deployment_time": time.time()
+                "deployment_time": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
             }
             
-            # Clean up temporary files
-            for temp_file in [dependencies_zip, app_zip]:
-                if Path(temp_file).exists():
-                    Path(temp_file).unlink()
-            
             logger.info("\n" + "=" * 60)
             logger.info("🎉 Deployment Complete!")
             logger.info("=" * 60)
@@ -446,9 +1197,19 @@ class AgentCoreDeployment:
             # Delete CloudFormation stack
             self.cloudformation.delete_stack(StackName=self.stack_name)
             
-            # Wait for deletion
-            waiter = self.cloudformation.get_waiter('stack_delete_complete')
-            waiter.wait(StackName=self.stack_name)
+            # Poll the filtered stack description until the stack is gone
+            deadline = time.monotonic() + STACK_TIMEOUT_SECONDS
+            delay = STACK_POLL_MIN_DELAY
+            while True:
+                stack = self._describe_stack()
+                if stack is None or stack['StackStatus'] == 'DELETE_COMPLETE':
+                    break
+                if stack['StackStatus'] == 'DELETE_FAILED':
+                    raise RuntimeError(f"Stack {self.stack_name} deletion failed: {stack.get('StackStatusReason')}")
+                if time.monotonic() + delay > deadline:
+                    raise TimeoutError(f"Timed out waiting for stack {self.stack_name} deletion")
+                time.sleep(delay)
+                delay = min(delay * 1.5, STACK_POLL_MAX_DELAY)
             
             logger.info("✅ Cleanup completed")
             
@@ -466,11 +1227,16 @@ def main():
     parser.add_argument("--environment", default="production", choices=["development", "staging", "production"], help="Environment")
     parser.add_argument("--cleanup", action="store_true", help="Clean up deployment")
     parser.add_argument("--validate-only", action="store_true", help="Only validate prerequisites")
+    parser.add_argument("--use-container", action="store_true", help="Install dependencies in the Lambda build image (requires Docker)")
     
     args = parser.parse_args()
     
     # Create deployer
-    deployer = AgentCoreDeployment(region=args.region, environment=args.environment)
+    deployer = AgentCoreDeployment(
+        region=args.region,
+        environment=args.environment,
+        use_container=args.use_container
+    )
     
     try:
         if args.cleanup:
@@ -488,7 +1254,7 @@ def main():
             # Save deployment info
             info_file = f"deployment_info_{args.environment}.json"
             with open(info_file, 'w') as f:
-                json.dump(deployment_info, f, indent=2, default=str)
+                json.dump(deployment_info, f, indent=2)
             
             logger.info(f"\n📄 Deployment info saved to: {info_file}")
             
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Packaging tests for the AgentCore deployment script: zip building, S3 multipart
+streaming, content digests and dependency layer installs
+"""
+
+import gc
+import io
+import os
+import zipfile
+import tempfile
+import contextlib
+from pathlib import Path
+
+from deploy_to_agentcore import (
+    AgentCoreDeployment, S3MultipartWriter, _content_digest, _prune_layer, build_zip
+)
+
+
+class FakeS3Client:
+    """In-memory stand-in for the multipart calls of a boto3 S3 client"""
+    
+    def __init__(self, fail_part=None):
+        self.fail_part = fail_part
+        self.parts = {}
+        self.completed = None
+        self.aborted = False
+    
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        return {'UploadId': 'upload-1'}
+    
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_part:
+            raise ConnectionError(f"part {PartNumber} failed")
+        self.parts[PartNumber] = Body
+        return {'ETag': f'"etag-{PartNumber}"'}
+    
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.completed = MultipartUpload['Parts']
+    
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted = True
+    
+    def uploaded_object(self):
+        return b''.join(self.parts[part['PartNumber']] for part in self.completed)
+
+
+def _sample_files(root):
+    """Write a mix of small, compressible and already-compressed files"""
+    contents = {
+        'handler.py': b'print("hello")\n',
+        'pkg/module.py': b'def f():\n    return 42\n' * 500,
+        'pkg/data.whl': os.urandom(64 * 1024),
+        'pkg/empty.txt': b''
+    }
+    entries = []
+    for arcname, data in contents.items():
+        path = Path(root) / arcname
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        entries.append((path, arcname))
+    return entries, contents
+
+
+@contextlib.contextmanager
+def _chdir(path):
+    """Run the deployment helpers, which use relative paths, from another directory"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _assert_archive(data, contents):
+    with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+        assert zipf.testzip() is None
+        assert sorted(zipf.namelist()) == sorted(contents)
+        for arcname, expected in contents.items():
+            assert zipf.read(arcname) == expected
+
+
+def test_build_zip_to_file():
+    """Archives written to a seekable file are valid"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        entries, contents = _sample_files(temp_dir)
+        archive = Path(temp_dir) / 'out.zip'
+        
+        unpacked_size, packed_size = build_zip(archive, entries)
+        
+        assert unpacked_size == sum(len(data) for data in contents.values())
+        assert packed_size < unpacked_size
+        _assert_archive(archive.read_bytes(), contents)
+
+
+def test_build_zip_streamed_to_multipart_upload():
+    """Archives streamed through the non-seekable S3 writer are valid"""
+    s3 = FakeS3Client()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        entries, contents = _sample_files(temp_dir)
+        with S3MultipartWriter(s3, 'bucket', 'key.zip', part_size=8 * 1024) as stream:
+            assert not stream.seekable()
+            build_zip(stream, entries)
+    
+    assert not s3.aborted
+    assert len(s3.completed) > 1
+    assert [part['PartNumber'] for part in s3.completed] == list(range(1, len(s3.completed) + 1))
+    _assert_archive(s3.uploaded_object(), contents)
+
+
+def test_failed_part_aborts_upload():
+    """A part that fails to upload aborts the whole multipart upload"""
+    s3 = FakeS3Client(fail_part=2)
+    
+    try:
+        with S3MultipartWriter(s3, 'bucket', 'key.zip', part_size=1024) as stream:
+            stream.write(b'x' * 4096)
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("upload failure was not raised")
+    
+    assert s3.aborted
+    assert s3.completed is None
+
+
+def test_unfinished_writer_is_aborted():
+    """Closing or dropping a writer without a clean exit never publishes a partial object"""
+    s3 = FakeS3Client()
+    stream = S3MultipartWriter(s3, 'bucket', 'key.zip', part_size=1024)
+    stream.write(b'x' * 4096)
+    stream.close()
+    
+    assert s3.aborted
+    assert s3.completed is None
+    
+    s3 = FakeS3Client()
+    stream = S3MultipartWriter(s3, 'bucket', 'key.zip', part_size=1024)
+    stream.write(b'x' * 100)
+    del stream
+    gc.collect()
+    
+    assert s3.aborted
+    assert s3.completed is None
+
+
+def test_content_digest():
+    """The digest ignores ordering but changes on any add, rename or edit"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        entries, _ = _sample_files(temp_dir)
+        paths = [path for path, _ in entries]
+        digest = _content_digest(paths)
+        
+        assert digest == _content_digest(reversed(paths))
+        assert digest != _content_digest(paths[1:])
+        
+        extra = Path(temp_dir) / 'extra.py'
+        extra.write_bytes(b'')
+        assert digest != _content_digest(paths + [extra])
+        
+        renamed = paths[0].with_name('renamed.py')
+        paths[0].rename(renamed)
+        assert digest != _content_digest([renamed] + paths[1:])
+        renamed.rename(paths[0])
+        assert digest == _content_digest(paths)
+        
+        paths[0].write_bytes(b'print("changed")\n')
+        assert digest != _content_digest(paths)
+
+
+def test_prune_layer():
+    """Caches, tests, stubs and wheel RECORD files are removed; code and metadata stay"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        layer_dir = Path(temp_dir)
+        kept = ['pkg/__init__.py', 'pkg/RECORD', 'pkg-1.0.dist-info/METADATA']
+        removed = [
+            'pkg/__pycache__/__init__.cpython-311.pyc',
+            'pkg/tests/test_pkg.py',
+            'pkg/__init__.pyi',
+            'pkg-1.0.dist-info/RECORD'
+        ]
+        for name in kept + removed:
+            path = layer_dir / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b'x')
+        
+        _prune_layer(layer_dir)
+        
+        remaining = sorted(p.relative_to(layer_dir).as_posix() for p in layer_dir.rglob('*') if p.is_file())
+        assert remaining == sorted(kept)
+        assert not (layer_dir / 'pkg/__pycache__').exists()
+        assert not (layer_dir / 'pkg/tests').exists()
+
+
+def test_pip_install_command():
+    """Host installs pin Lambda wheels; container installs pin the docker platform"""
+    with tempfile.TemporaryDirectory() as temp_dir, _chdir(temp_dir):
+        layer_dir = Path(temp_dir) / 'python'
+        
+        host = AgentCoreDeployment()._pip_install_command(layer_dir)
+        assert host[1:4] == ['-m', 'pip', 'install']
+        assert '--only-binary=:all:' in host
+        assert host[host.index('--platform') + 1] == 'manylinux2014_x86_64'
+        assert host[host.index('--abi') + 1] == 'cp311'
+        assert host[host.index('-t') + 1] == str(layer_dir)
+        
+        deployment = AgentCoreDeployment(use_container=True)
+        container = deployment._pip_install_command(layer_dir)
+        assert container[:5] == ['docker', 'run', '--rm', '--platform', 'linux/amd64']
+        assert 'public.ecr.aws/sam/build-python3.11' in container
+        assert '--only-binary=:all:' not in container
+        assert f"{layer_dir.resolve()}:/var/task/python" in container
+        
+        deployment.config['lambda_architecture'] = 'arm64'
+        assert deployment._pip_install_command(layer_dir)[3:5] == ['--platform', 'linux/arm64']
+
+
+def test_dependencies_digest():
+    """The layer digest follows requirements.txt, the install mode and the architecture"""
+    with tempfile.TemporaryDirectory() as temp_dir, _chdir(temp_dir):
+        Path('requirements.txt').write_text('boto3>=1.34.0\n')
+        host = AgentCoreDeployment()
+        container = AgentCoreDeployment(use_container=True)
+        digest = host._dependencies_digest()
+        
+        assert digest == AgentCoreDeployment()._dependencies_digest()
+        assert digest != container._dependencies_digest()
+        assert host._dependencies_key() != container._dependencies_key()
+        
+        host.config['lambda_architecture'] = 'arm64'
+        assert digest != host._dependencies_digest()
+        host.config['lambda_architecture'] = 'x86_64'
+        
+        Path('requirements.txt').write_text('boto3>=1.35.0\n')
+        assert digest != host._dependencies_digest()
+
+
+if __name__ == "__main__":
+    test_build_zip_to_file()
+    test_build_zip_streamed_to_multipart_upload()
+    test_failed_part_aborts_upload()
+    test_unfinished_writer_is_aborted()
+    test_content_digest()
+    test_prune_layer()
+    test_pip_install_command()
+    test_dependencies_digest()
+    print("✅ All packaging tests passed!")
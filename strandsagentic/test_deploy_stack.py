@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Stack tests for the AgentCore deployment script: stack lookups, event polling
+and the create-or-update flow, against an in-memory CloudFormation client
+"""
+
+import hashlib
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+import deploy_to_agentcore
+from deploy_to_agentcore import TEMPLATE_DIGEST_TAG, TEMPLATE_PATH, AgentCoreDeployment
+
+STACK_NAME = 'flight-cargo-assessment-production'
+
+
+class FakePaginator:
+    """Yields the pages produced by a callable, like a boto3 paginator"""
+    
+    def __init__(self, pages):
+        self.pages = pages
+    
+    def paginate(self, **kwargs):
+        return iter(self.pages(**kwargs))
+
+
+class AlreadyExistsException(Exception):
+    pass
+
+
+class FakeCloudFormationClient:
+    """In-memory stand-in for the CloudFormation calls made during a deployment"""
+    
+    class exceptions:
+        AlreadyExistsException = AlreadyExistsException
+    
+    def __init__(self, stack=None, event_polls=()):
+        self.stack = stack
+        self.event_polls = list(event_polls)
+        self.calls = []
+        self.request_token = None
+    
+    def get_paginator(self, operation_name):
+        return FakePaginator(getattr(self, f'_{operation_name}_pages'))
+    
+    def _describe_stacks_pages(self, StackName):
+        self.calls.append('describe_stacks')
+        if self.stack is None:
+            raise ClientError(
+                {'Error': {'Code': 'ValidationError', 'Message': f'Stack with id {StackName} does not exist'}},
+                'DescribeStacks'
+            )
+        return [{'Stacks': [self.stack]}]
+    
+    def _describe_stack_events_pages(self, StackName):
+        # Each poll returns the full history, newest first, split over two pages
+        events = self.event_polls.pop(0) if len(self.event_polls) > 1 else self.event_polls[0]
+        events = [{'ClientRequestToken': self.request_token, **event} for event in events]
+        return [{'StackEvents': events[:2]}, {'StackEvents': events[2:]}]
+    
+    def create_stack(self, **kwargs):
+        self.calls.append('create_stack')
+        if self.stack is not None:
+            raise AlreadyExistsException(STACK_NAME)
+        self.request_token = kwargs['ClientRequestToken']
+        self.stack = {'Outputs': [], 'Tags': kwargs['Tags']}
+    
+    def update_stack(self, **kwargs):
+        self.calls.append('update_stack')
+        self.update_args = kwargs
+        self.request_token = kwargs['ClientRequestToken']
+
+
+class FakeS3Client:
+    """S3 stand-in where no artifact has been uploaded yet"""
+    
+    def head_object(self, Bucket, Key):
+        raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+
+
+def _event(event_id, logical_id, status, **extra):
+    return {'EventId': event_id, 'LogicalResourceId': logical_id, 'ResourceStatus': status, **extra}
+
+
+def _deployment(cloudformation, s3=None):
+    deployment = AgentCoreDeployment()
+    deployment._clients['cloudformation'] = cloudformation
+    deployment._clients['s3'] = s3 or FakeS3Client()
+    return deployment
+
+
+def _template_digest():
+    with open(TEMPLATE_PATH, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_describe_stack():
+    """A missing stack is reported as None rather than an error"""
+    assert _deployment(FakeCloudFormationClient())._describe_stack() is None
+    
+    stack = {'StackName': STACK_NAME, 'Outputs': []}
+    assert _deployment(FakeCloudFormationClient(stack=stack))._describe_stack() is stack
+
+
+def test_wait_for_stack_follows_events():
+    """Polling skips other operations' events, backs off while idle and stops on completion"""
+    cloudformation = FakeCloudFormationClient(event_polls=[
+        [],
+        [_event('e2', 'AgentRole', 'CREATE_COMPLETE'), _event('e1', STACK_NAME, 'CREATE_IN_PROGRESS')],
+        [
+            _event('e3', STACK_NAME, 'CREATE_COMPLETE'),
+            _event('e2', 'AgentRole', 'CREATE_COMPLETE'),
+            _event('e1', STACK_NAME, 'CREATE_IN_PROGRESS')
+        ]
+    ])
+    cloudformation.request_token = 'deploy-1'
+    deployment = _deployment(cloudformation)
+    
+    with mock.patch.object(deploy_to_agentcore.time, 'sleep') as sleep:
+        deployment._wait_for_stack('deploy-1')
+    
+    # Idle poll backs off, the poll with events speeds back up
+    delays = [call.args[0] for call in sleep.call_args_list]
+    assert delays == [deploy_to_agentcore.STACK_POLL_MIN_DELAY * 1.5, deploy_to_agentcore.STACK_POLL_MIN_DELAY]
+    assert len(cloudformation.event_polls) == 1  # every scripted poll was consumed
+    
+    # Events from an earlier deployment never complete the wait
+    cloudformation = FakeCloudFormationClient(event_polls=[[_event('old', STACK_NAME, 'UPDATE_COMPLETE')]])
+    cloudformation.request_token = 'deploy-0'
+    try:
+        with mock.patch.object(deploy_to_agentcore.time, 'sleep'):
+            _deployment(cloudformation)._wait_for_stack('deploy-1', timeout=5)
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("events from another operation ended the wait")
+
+
+def test_wait_for_stack_raises_on_failure():
+    """A failed stack operation surfaces its status reason"""
+    cloudformation = FakeCloudFormationClient(event_polls=[[
+        _event('e2', STACK_NAME, 'ROLLBACK_COMPLETE'),
+        _event('e1', 'AgentRole', 'CREATE_FAILED', ResourceStatusReason='Access denied')
+    ]])
+    cloudformation.request_token = 'deploy-1'
+    
+    try:
+        with mock.patch.object(deploy_to_agentcore.time, 'sleep'):
+            _deployment(cloudformation)._wait_for_stack('deploy-1')
+    except RuntimeError as e:
+        assert 'ROLLBACK_COMPLETE' in str(e)
+    else:
+        raise AssertionError("stack failure was not raised")
+
+
+def test_deploy_infrastructure_creates_stack():
+    """A first deployment creates the stack without an existence probe"""
+    cloudformation = FakeCloudFormationClient(event_polls=[[_event('e1', STACK_NAME, 'CREATE_COMPLETE')]])
+    deployment = _deployment(cloudformation)
+    
+    with mock.patch.object(deploy_to_agentcore.time, 'sleep'):
+        assert deployment.deploy_infrastructure() == {}
+    
+    assert cloudformation.calls == ['create_stack', 'describe_stacks']
+
+
+def test_deploy_infrastructure_updates_existing_stack():
+    """An existing stack is updated once the dependencies layer it references is uploaded"""
+    stack = {
+        'Outputs': [{'OutputKey': 'S3BucketName', 'OutputValue': 'artifacts'}],
+        'Tags': [{'Key': TEMPLATE_DIGEST_TAG, 'Value': 'stale'}]
+    }
+    cloudformation = FakeCloudFormationClient(stack=stack, event_polls=[[_event('e1', STACK_NAME, 'UPDATE_COMPLETE')]])
+    deployment = _deployment(cloudformation)
+    deployment.package_dependencies = lambda bucket_name, key, digest: cloudformation.calls.append(
+        f'package_dependencies:{bucket_name}:{key}'
+    )
+    
+    with mock.patch.object(deploy_to_agentcore.time, 'sleep'):
+        outputs = deployment.deploy_infrastructure()
+    
+    assert outputs == {'S3BucketName': 'artifacts'}
+    assert cloudformation.calls == [
+        'create_stack',
+        'describe_stacks',
+        f'package_dependencies:artifacts:{deployment._dependencies_key()}',
+        'update_stack',
+        'describe_stacks'
+    ]
+    assert 'TemplateBody' in cloudformation.update_args
+    
+    # An unchanged template is not re-sent
+    stack['Tags'] = [{'Key': TEMPLATE_DIGEST_TAG, 'Value': _template_digest()}]
+    with mock.patch.object(deploy_to_agentcore.time, 'sleep'):
+        deployment.deploy_infrastructure()
+    
+    assert cloudformation.update_args['UsePreviousTemplate'] is True
+    assert 'TemplateBody' not in cloudformation.update_args
+
+
+if __name__ == "__main__":
+    test_describe_stack()
+    test_wait_for_stack_follows_events()
+    test_wait_for_stack_raises_on_failure()
+    test_deploy_infrastructure_creates_stack()
+    test_deploy_infrastructure_updates_existing_stack()
+    print("✅ All stack tests passed!")
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Tests for the Bedrock setup validator: per-thread output capture, the
+on-disk result cache, the aioboto3 prefetch and when the AWS checks are skipped
+"""
+
+import io
+import os
+import sys
+import json
+import types
+import asyncio
+import tempfile
+import threading
+from unittest import mock
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+import validate_bedrock_setup
+from validate_bedrock_setup import (
+    _call, _prefetch, _redact_identity, _uncached_aws_calls, captured, ttl_cache_to_disk
+)
+
+
+class CountingCheck:
+    """Check that prints a line and returns a fixed result, counting its runs"""
+    
+    def __init__(self, result=True, output="✅ Check passed\n"):
+        self.result = result
+        self.output = output
+        self.runs = 0
+        self.__name__ = "counting_check"
+    
+    def __call__(self):
+        self.runs += 1
+        print(self.output, end="")
+        return self.result
+
+
+def _run(check):
+    """Run a check and return its result with everything it printed"""
+    with captured() as buffer:
+        result = check()
+    return result, buffer.getvalue()
+
+
+def _cached_check(path, **kwargs):
+    counting = CountingCheck(**kwargs)
+    return counting, ttl_cache_to_disk(path, ttl_seconds=60)(counting)
+
+
+def test_captured_restores_stdout():
+    """Nested and concurrent captures each get their own output; stdout is restored afterwards"""
+    original = sys.stdout
+    
+    with captured() as outer:
+        print("outer")
+        with captured() as inner:
+            print("inner")
+        print("outer again")
+    
+    assert (outer.getvalue(), inner.getvalue()) == ("outer\nouter again\n", "inner\n")
+    assert sys.stdout is original
+    
+    barrier = threading.Barrier(4)
+    outputs = {}
+    
+    def worker(name):
+        with captured() as buffer:
+            barrier.wait()
+            print(name)
+            barrier.wait()
+        outputs[name] = buffer.getvalue()
+    
+    threads = [threading.Thread(target=worker, args=(f"check-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert outputs == {f"check-{i}": f"check-{i}\n" for i in range(4)}
+    assert sys.stdout is original
+    
+    # A stream swapped in while nothing is captured is left in place
+    replacement = io.StringIO()
+    with mock.patch.object(sys, "stdout", replacement):
+        with captured():
+            print("hidden")
+        assert sys.stdout is replacement
+        assert replacement.getvalue() == ""
+    assert sys.stdout is original
+
+
+def test_cache_hit_replays_output():
+    """A passing result is served from disk with the output it printed"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        counting, check = _cached_check(os.path.join(temp_dir, "cache.json"))
+        
+        assert _run(check) == (True, "✅ Check passed\n")
+        assert check.is_cached()
+        
+        result, output = _run(check)
+        assert result is True
+        assert output.startswith("✅ Check passed\n")
+        assert "cached result" in output
+        assert counting.runs == 1
+
+
+def test_failures_are_not_cached():
+    """A failing check runs again on every call"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "cache.json")
+        counting, check = _cached_check(path, result=False)
+        
+        _run(check)
+        _run(check)
+        
+        assert counting.runs == 2
+        assert not check.is_cached()
+        assert not os.path.exists(path)
+
+
+def test_force_bypasses_cache():
+    """--force reruns a check even when a fresh result is cached"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        counting, check = _cached_check(os.path.join(temp_dir, "cache.json"))
+        _run(check)
+        
+        with mock.patch.object(validate_bedrock_setup, "_force_refresh", True):
+            assert not check.is_cached()
+            _run(check)
+        
+        assert counting.runs == 2
+
+
+def test_cache_expires_after_ttl():
+    """Results older than the TTL are rechecked"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        counting, check = _cached_check(os.path.join(temp_dir, "cache.json"))
+        now = validate_bedrock_setup.time.time()
+        
+        with mock.patch.object(validate_bedrock_setup.time, "time", return_value=now):
+            _run(check)
+        with mock.patch.object(validate_bedrock_setup.time, "time", return_value=now + 59):
+            _run(check)
+            assert counting.runs == 1
+        with mock.patch.object(validate_bedrock_setup.time, "time", return_value=now + 61):
+            assert not check.is_cached()
+            _run(check)
+        
+        assert counting.runs == 2
+
+
+def test_credentials_and_profile_key_the_cache():
+    """Switching keys, session token or profile invalidates cached results"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        counting, check = _cached_check(os.path.join(temp_dir, "cache.json"))
+        environments = [
+            {"AWS_ACCESS_KEY_ID": "AKIAEXAMPLE1", "AWS_PROFILE": "dev"},
+            {"AWS_ACCESS_KEY_ID": "AKIAEXAMPLE2", "AWS_PROFILE": "dev"},
+            {"AWS_ACCESS_KEY_ID": "AKIAEXAMPLE2", "AWS_PROFILE": "dev", "AWS_SESSION_TOKEN": "token"},
+            {"AWS_ACCESS_KEY_ID": "AKIAEXAMPLE2", "AWS_PROFILE": "prod", "AWS_SESSION_TOKEN": "token"}
+        ]
+        
+        for runs, environment in enumerate(environments, start=1):
+            with mock.patch.dict(os.environ, environment):
+                assert not check.is_cached()
+                _run(check)
+                _run(check)
+            assert counting.runs == runs
+        
+        # The cache file never holds the credentials themselves
+        with open(os.path.join(temp_dir, "cache.json")) as f:
+            contents = f.read()
+        assert "AKIAEXAMPLE" not in contents and "token" not in contents
+
+
+def test_identity_is_redacted_from_cache():
+    """The account and ARN printed by the credentials check are not written to disk"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "cache.json")
+        counting = CountingCheck(output=(
+            "✅ AWS credentials found\n"
+            "   Account: 123456789012\n"
+            "   Identity: arn:aws:iam::123456789012:user/alice\n"
+        ))
+        check = ttl_cache_to_disk(path, ttl_seconds=60, redact=_redact_identity)(counting)
+        
+        assert "123456789012" in _run(check)[1]
+        
+        with open(path) as f:
+            (entry,) = json.load(f).values()
+        assert entry["output"] == "✅ AWS credentials found\n"
+        assert "123456789012" not in _run(check)[1]
+        assert counting.runs == 1
+
+
+class FakeStreamingBody:
+    """Async response body that must be read before its client closes"""
+    
+    def __init__(self, data, client):
+        self.data = data
+        self.client = client
+        self.released = False
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.released = True
+    
+    async def read(self):
+        assert self.client.open, "body read after its client was closed"
+        return self.data
+
+
+class FakeAsyncClient:
+    """Async client answering each operation from a table of responses or exceptions"""
+    
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.open = False
+    
+    async def __aenter__(self):
+        self.open = True
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.open = False
+    
+    def __getattr__(self, operation):
+        async def call(**kwargs):
+            outcome = self.outcomes[operation]
+            if isinstance(outcome, Exception):
+                raise outcome
+            if operation == "invoke_model":
+                self.body = FakeStreamingBody(outcome, self)
+                return {"body": self.body, "contentType": "application/json"}
+            return outcome
+        return call
+
+
+class FakeAioSession:
+    """aioboto3.Session stand-in that records the clients it opens"""
+    
+    def __init__(self, outcomes, credentials=mock.sentinel.credentials):
+        self.outcomes = outcomes
+        self.credentials = credentials
+        self.clients = []
+    
+    async def get_credentials(self):
+        if isinstance(self.credentials, Exception):
+            raise self.credentials
+        return self.credentials
+    
+    def client(self, service, **kwargs):
+        client = FakeAsyncClient(self.outcomes)
+        self.clients.append((service, client))
+        return client
+
+
+def _prefetch_with(session, calls):
+    """Run _prefetch against a fake aioboto3 session and return what it stored"""
+    aioboto3 = types.ModuleType("aioboto3")
+    aioboto3.Session = lambda: session
+    with mock.patch.dict(sys.modules, {"aioboto3": aioboto3}):
+        asyncio.run(_prefetch(calls))
+    return dict(validate_bedrock_setup._prefetched)
+
+
+PREFETCH_CALLS = [
+    ("sts", "get_caller_identity", {}),
+    ("bedrock", "list_foundation_models", {"byProvider": "Anthropic"}),
+    ("bedrock", "list_foundation_models", {"byProvider": "Amazon"}),
+    ("bedrock-runtime", "invoke_model", {"modelId": "anthropic.claude-3-5-haiku-20241022-v1:0"})
+]
+
+
+def test_prefetch_replays_responses():
+    """Prefetched responses are replayed without a synchronous call, one client per service"""
+    session = FakeAioSession({
+        "get_caller_identity": {"Account": "123456789012"},
+        "list_foundation_models": {"modelSummaries": []},
+        "invoke_model": b'{"content": []}'
+    })
+    
+    with mock.patch.dict(validate_bedrock_setup._prefetched, clear=True), \
+            mock.patch.object(validate_bedrock_setup, "_client", side_effect=AssertionError("AWS called")):
+        prefetched = _prefetch_with(session, PREFETCH_CALLS)
+        
+        assert len(prefetched) == 4
+        assert [service for service, _ in session.clients] == ["sts", "bedrock", "bedrock-runtime"]
+        assert not any(client.open for _, client in session.clients)
+        
+        assert _call("sts", "get_caller_identity") == {"Account": "123456789012"}
+        assert _call("bedrock", "list_foundation_models", byProvider="Amazon") == {"modelSummaries": []}
+        
+        # The body was read and released inside the coroutine, and replays as a normal stream
+        response = _call("bedrock-runtime", "invoke_model", modelId="anthropic.claude-3-5-haiku-20241022-v1:0")
+        assert session.clients[-1][1].body.released
+        assert response["body"].read() == b'{"content": []}'
+
+
+def test_prefetch_replays_client_errors():
+    """AWS errors are stored and raised again, as a separate copy for each check"""
+    error = ClientError({"Error": {"Code": "AccessDeniedException", "Message": "denied"}}, "InvokeModel")
+    session = FakeAioSession({"invoke_model": error})
+    call = PREFETCH_CALLS[-1]
+    
+    with mock.patch.dict(validate_bedrock_setup._prefetched, clear=True), \
+            mock.patch.object(validate_bedrock_setup, "_client", side_effect=AssertionError("AWS called")):
+        _prefetch_with(session, [call])
+        
+        raised = []
+        for _ in range(2):
+            try:
+                _call(call[0], call[1], **call[2])
+            except ClientError as e:
+                raised.append(e)
+        
+        assert len(raised) == 2 and raised[0] is not raised[1]
+        assert all(e.response["Error"]["Code"] == "AccessDeniedException" for e in raised)
+
+
+def test_prefetch_falls_back_on_other_errors():
+    """Calls failing outside botocore, or without credentials, are left to the checks"""
+    session = FakeAioSession({
+        "get_caller_identity": TypeError("incompatible aiobotocore"),
+        "list_foundation_models": {"modelSummaries": []}
+    })
+    sync_client = mock.Mock()
+    sync_client.get_caller_identity.return_value = {"Account": "sync"}
+    
+    with mock.patch.dict(validate_bedrock_setup._prefetched, clear=True), \
+            mock.patch.object(validate_bedrock_setup, "_client", return_value=sync_client):
+        prefetched = _prefetch_with(session, PREFETCH_CALLS[:2])
+        
+        assert [key[:2] for key in prefetched] == [("bedrock", "list_foundation_models")]
+        assert _call("sts", "get_caller_identity") == {"Account": "sync"}
+    
+    for credentials in (None, BotoCoreError()):
+        session = FakeAioSession({}, credentials=credentials)
+        with mock.patch.dict(validate_bedrock_setup._prefetched, clear=True):
+            assert _prefetch_with(session, PREFETCH_CALLS) == {}
+        assert session.clients == []
+
+
+def test_uncached_aws_calls():
+    """Only the calls of checks without a cached result are prefetched"""
+    checks = (
+        validate_bedrock_setup.check_aws_credentials,
+        validate_bedrock_setup.check_bedrock_access,
+        validate_bedrock_setup.check_bedrock_runtime
+    )
+    
+    def operations(cached, deep):
+        with mock.patch.object(checks[0], "is_cached", return_value=cached[0]), \
+                mock.patch.object(checks[1], "is_cached", return_value=cached[1]), \
+                mock.patch.object(checks[2], "is_cached", return_value=cached[2]):
+            return [operation for _, operation, _ in _uncached_aws_calls(deep)]
+    
+    assert operations((False, False, False), deep=True) == [
+        "get_caller_identity", "list_foundation_models", "invoke_model"
+    ]
+    assert operations((False, False, False), deep=False) == ["get_caller_identity", "list_foundation_models"]
+    assert operations((True, True, False), deep=False) == ["list_foundation_models"]
+    assert operations((True, True, True), deep=True) == []
+
+
+def _checks_run_by_main(credentials):
+    """Run main() in ai_powered mode without key variables and return the AWS checks it ran"""
+    ran = []
+    
+    def run_checks(checks):
+        ran.extend(check_name for check_name, _ in checks)
+        return {check_name: True for check_name, _ in checks}
+    
+    session = mock.Mock()
+    session.get_credentials.return_value = credentials
+    environment = {"CARGO_AGENT_MODE": "ai_powered", "AWS_ACCESS_KEY_ID": "", "AWS_SECRET_ACCESS_KEY": ""}
+    
+    with mock.patch.dict(os.environ, environment), \
+            mock.patch.object(validate_bedrock_setup, "_session", return_value=session), \
+            mock.patch.object(validate_bedrock_setup, "check_dependencies", return_value=True), \
+            mock.patch.object(validate_bedrock_setup, "_uncached_aws_calls", return_value=[]), \
+            mock.patch.object(validate_bedrock_setup, "run_checks", side_effect=run_checks), \
+            mock.patch.object(validate_bedrock_setup, "print_summary", return_value=0), \
+            captured():
+        validate_bedrock_setup.main([])
+    return ran
+
+
+def test_ai_mode_skips_aws_checks_only_without_credentials():
+    """Profile, SSO or instance-role credentials keep the AWS checks running"""
+    aws_checks = ["AWS Credentials", "Bedrock Access", "Bedrock Runtime", "Configuration"]
+    assert _checks_run_by_main(credentials=mock.sentinel.credentials) == aws_checks
+    assert _checks_run_by_main(credentials=None) == ["Configuration"]
+
+
+if __name__ == "__main__":
+    test_captured_restores_stdout()
+    test_cache_hit_replays_output()
+    test_failures_are_not_cached()
+    test_force_bypasses_cache()
+    test_cache_expires_after_ttl()
+    test_credentials_and_profile_key_the_cache()
+    test_identity_is_redacted_from_cache()
+    test_prefetch_replays_responses()
+    test_prefetch_replays_client_errors()
+    test_prefetch_falls_back_on_other_errors()
+    test_uncached_aws_calls()
+    test_ai_mode_skips_aws_checks_only_without_credentials()
+    print("✅ All validator tests passed!")